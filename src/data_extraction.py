@@ -1,22 +1,80 @@
 import os
 import praw
+import prawcore
 import pandas as pd
 from datetime import datetime, timedelta
 import re
+import time
+import argparse
+import threading
 import emoji
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # API Crendentials are saved in a .env 
 load_dotenv()
 
-class RedditExtractor:
+class RequestCounter:
+    """Number of HTTP requests sent by the client of one comment worker"""
     def __init__(self):
-        # Reddit API credentials loaded from .env
-        self.reddit_client = praw.Reddit(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT')
-        )
+        self.calls = 0
+
+class RequestThrottle:
+    """Spaces out the requests of all comment workers, which share one Reddit API quota"""
+    def __init__(self, min_interval=0.6):
+        # Reddit allows about 100 requests per minute for an OAuth client
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_request = 0.0
+    
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_request - now
+            self._next_request = max(now, self._next_request) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+class CountingRequestor(prawcore.Requestor):
+    """Requestor that throttles and counts every HTTP request, including token requests and retries"""
+    def __init__(self, *args, counter=None, throttle=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counter = counter
+        self.throttle = throttle
+    
+    def request(self, *args, **kwargs):
+        if self.throttle is not None:
+            self.throttle.wait()
+        if self.counter is not None:
+            self.counter.calls += 1
+        return super().request(*args, **kwargs)
+
+def create_reddit_client(counter=None, throttle=None):
+    """Reddit API client built from the credentials in .env"""
+    return praw.Reddit(
+        client_id=os.getenv('REDDIT_CLIENT_ID'),
+        client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+        user_agent=os.getenv('REDDIT_USER_AGENT'),
+        requestor_class=CountingRequestor,
+        requestor_kwargs={'counter': counter, 'throttle': throttle}
+    )
+
+class RedditExtractor:
+    def __init__(self, client_factory=create_reddit_client):
+        # praw.Reddit is not thread-safe, so every comment worker builds its own client
+        # from this factory (a stub factory can be passed to run offline)
+        self.client_factory = client_factory
+        self.reddit_client = client_factory()
+        self._local = threading.local()
+        
+        # The worker clients share one API quota, so their requests go through one throttle
+        # and rate-limited fetches are retried with exponential backoff
+        self.throttle = RequestThrottle()
+        self.max_retries = 3
+        self.retry_backoff = 2.0
+        
+        # Statistics of the last comment extraction
+        self.comment_stats = {}
         
         # Crisis-related keywords to search for in posts
         self.crisis_keywords = [
@@ -114,15 +172,149 @@ class RedditExtractor:
         
         return pd.DataFrame(reddit_data)
     
+    def _thread_counter(self):
+        """Request counter of the current worker thread"""
+        counter = getattr(self._local, 'counter', None)
+        if counter is None:
+            counter = RequestCounter()
+            self._local.counter = counter
+        return counter
+    
+    def _thread_client(self):
+        """Reddit client of the current worker thread, counting every API request it makes"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self.client_factory(counter=self._thread_counter(), throttle=self.throttle)
+            self._local.client = client
+        return client
+    
+    def fetch_post_comments(self, post_id, comment_budget=200, replace_more_limit=8):
+        """Fetch the comment forest of a post with the current thread's client and return the comment rows"""
+        submission = self._thread_client().submission(id=post_id)
+        
+        # Asking Reddit for no more comments than the budget allows
+        submission.comment_limit = comment_budget
+        forest = submission.comments
+        
+        # Expanding at most replace_more_limit "load more comments" stubs, the rest are dropped
+        forest.replace_more(limit=replace_more_limit)
+        
+        rows = []
+        for comment in forest.list():
+            # Unexpanded "load more comments" stubs have no body
+            if not hasattr(comment, 'body'):
+                continue
+            if comment.body in ('[deleted]', '[removed]'):
+                continue
+            if len(rows) >= comment_budget:
+                break
+            
+            rows.append({
+                'platform': 'reddit',
+                'post_id': post_id,
+                'comment_id': comment.id,
+                'parent_id': comment.parent_id,
+                'depth': getattr(comment, 'depth', None),
+                'timestamp': datetime.fromtimestamp(comment.created_utc),
+                'content': comment.body,
+                'cleaned_content': self.clean_text(comment.body),
+                'upvotes': comment.score,
+                'location': self.extract_location_from_text(comment.body),
+                'author': comment.author.name if comment.author else '[deleted]'
+            })
+        
+        return rows
+    
+    def extract_comments(self, post_ids, max_workers=4, comment_budget=200, replace_more_limit=8):
+        """Extract comment threads of matched posts concurrently with bounded workers"""
+        post_ids = list(post_ids)
+        comment_data = []
+        api_calls = 0
+        failed_posts = 0
+        start = time.perf_counter()
+        
+        def fetch(post_id):
+            counter = self._thread_counter()
+            calls_before = counter.calls
+            rows = []
+            failed = True
+            for attempt in range(self.max_retries + 1):
+                try:
+                    rows = self.fetch_post_comments(post_id, comment_budget, replace_more_limit)
+                    failed = False
+                    break
+                except prawcore.TooManyRequests as e:
+                    if attempt == self.max_retries:
+                        print(f"Error fetching comments for post {post_id}: {str(e)}")
+                        break
+                    delay = float(e.retry_after) if e.retry_after else self.retry_backoff * 2 ** attempt
+                    print(f"Rate limited fetching comments for post {post_id}, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                except Exception as e:
+                    print(f"Error fetching comments for post {post_id}: {str(e)}")
+                    break
+            return rows, counter.calls - calls_before, failed
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for rows, calls, failed in executor.map(fetch, post_ids):
+                comment_data.extend(rows)
+                api_calls += calls
+                failed_posts += failed
+        
+        elapsed = time.perf_counter() - start
+        self.comment_stats = {
+            'posts': len(post_ids),
+            'failed_posts': failed_posts,
+            'comments': len(comment_data),
+            'api_calls': api_calls,
+            'seconds': elapsed,
+            'comments_per_second': len(comment_data) / elapsed if elapsed > 0 else 0.0
+        }
+        print(f"Fetched {len(comment_data)} comments from {len(post_ids)} posts in {elapsed:.2f}s "
+              f"({self.comment_stats['comments_per_second']:.1f} comments/sec, {api_calls} API calls, "
+              f"{failed_posts} failed posts)")
+        
+        return pd.DataFrame(comment_data, columns=[
+            'platform', 'post_id', 'comment_id', 'parent_id', 'depth', 'timestamp',
+            'content', 'cleaned_content', 'upvotes', 'location', 'author'
+        ])
+    
     def save_data(self, df, filename='reddit_posts.csv'):
         os.makedirs('data', exist_ok=True)
         
         #Saving the data to a CSV file
         df.to_csv(f'data/reddit_posts.csv', index=False)
         print(f"Data saved to data/reddit_posts.csv")
+    
+    def save_comments(self, df, filename='reddit_comments.csv'):
+        os.makedirs('data', exist_ok=True)
+        
+        #Saving the comments to a CSV file, linked to the posts by post_id
+        df.to_csv(f'data/{filename}', index=False)
+        print(f"Comments saved to data/{filename}")
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return number
 
 def main(): 
     #Main function to execute the data extraction
+    parser = argparse.ArgumentParser(description='Reddit crisis data extraction')
+    parser.add_argument('--comments', action='store_true', help='Also extract comment threads of matched posts')
+    parser.add_argument('--comment-workers', type=positive_int, default=4,
+                        help='Number of concurrent comment fetches (all workers share one throttled Reddit API quota)')
+    parser.add_argument('--comment-budget', type=non_negative_int, default=200, help='Maximum comments kept per post')
+    parser.add_argument('--replace-more-limit', type=non_negative_int, default=8, help='Maximum "load more comments" expansions per post')
+    args = parser.parse_args()
+    
     extractor = RedditExtractor()
     
     # Extracting Reddit data
@@ -130,6 +322,21 @@ def main():
     
     # Saving the data
     extractor.save_data(reddit_df)
+    
+    # Extracting and saving the comment threads of the matched posts
+    if args.comments:
+        post_ids = reddit_df['post_id'] if len(reddit_df) > 0 else []
+        comments_df = extractor.extract_comments(
+            post_ids,
+            max_workers=args.comment_workers,
+            comment_budget=args.comment_budget,
+            replace_more_limit=args.replace_more_limit
+        )
+        extractor.save_comments(comments_df)
+    elif os.path.exists('data/reddit_comments.csv'):
+        # Removing comments of an earlier run so they are not analyzed with the new posts
+        os.remove('data/reddit_comments.csv')
+        print("Removed stale data/reddit_comments.csv from an earlier run")
 
 if __name__ == "__main__":
     main() 
@@ -6,13 +6,79 @@ from geopy.geocoders import Nominatim
 from geopy.extra.rate_limiter import RateLimiter
 import re
 from collections import Counter
+from rendering import FigureJob, FigureRenderer
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import numpy as np
+import argparse
+
+
+def render_heatmap(data, output_path, dpi):
+    """Render the Folium heatmap with markers for high-risk posts (dpi is unused for HTML, so it has no preview)"""
+    m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
+    
+    HeatMap(data['heatmap_data']).add_to(m)
+    
+    marker_cluster = MarkerCluster().add_to(m)
+    
+    #Adding high-risk posts to the heatmap
+    for latitude, longitude, popup_text in data['markers']:
+        folium.Marker(
+            location=[latitude, longitude],
+            popup=folium.Popup(popup_text, max_width=300),
+            icon=folium.Icon(color='red', icon='info-sign')
+        ).add_to(marker_cluster)
+    
+    m.save(output_path)
+
+
+def render_regional_patterns(data, output_path, dpi):
+    """Render the 2x2 visualization of regional distress patterns"""
+    state_counts = data['state_counts']
+    state_risk = data['state_risk']
+    
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    
+
+    state_counts.plot(kind='bar', ax=axes[0, 0], color='skyblue')
+    axes[0, 0].set_title('Number of Crisis Posts by State')
+    axes[0, 0].set_xlabel('State')
+    axes[0, 0].set_ylabel('Number of Posts')
+    plt.setp(axes[0, 0].xaxis.get_majorticklabels(), rotation=45, ha='right')
+    
+    
+    for i, v in enumerate(state_counts.values):
+        axes[0, 0].text(i, v + 0.5, str(v), ha='center', va='bottom')
+    
+    #Bar plot of risk levels by state
+    state_risk.plot(kind='bar', stacked=True, ax=axes[0, 1], colormap='viridis')
+    axes[0, 1].set_title('Risk Levels by State')
+    axes[0, 1].set_xlabel('State')
+    axes[0, 1].set_ylabel('Number of Posts')
+    axes[0, 1].legend(title='Risk Level')
+    plt.setp(axes[0, 1].xaxis.get_majorticklabels(), rotation=45, ha='right')
+    
+    #Heatmap of risk levels by state
+    sns.heatmap(state_risk, annot=True, fmt='d', cmap='YlGnBu', ax=axes[1, 0])
+    axes[1, 0].set_title('Risk Levels by State (Heatmap)')
+    
+    #Top 5 states with crisis posts
+    top_states = state_counts.head(5)
+    axes[1, 1].pie(top_states.values, labels=top_states.index, autopct='%1.1f%%', 
+                  startangle=90, colors=sns.color_palette('viridis'))
+    axes[1, 1].set_title('Top 5 States with Crisis Posts')
+    
+    plt.tight_layout()
+    fig.savefig(output_path, dpi=dpi)
+    plt.close(fig)
+
 
 class LocationAnalyzer:
-    def __init__(self):
+    def __init__(self, preview=False):
+        
+        # Maps and figures are rendered in worker processes and skipped when their inputs are unchanged
+        self.renderer = FigureRenderer(preview=preview)
         
         self.nlp = spacy.load("en_core_web_sm")
         
@@ -199,18 +265,12 @@ class LocationAnalyzer:
         
         return None
     
-    def create_heatmap(self, df, output_file='crisis_heatmap.html'):
-        """Create a heatmap of crisis-related posts"""
-        
-        os.makedirs('data', exist_ok=True)
-        
+    def heatmap_job(self, df, output_file='crisis_heatmap.html'):
+        """Build the render job for the heatmap of crisis-related posts"""
         
         valid_posts = df[df['latitude'].notna() & df['longitude'].notna()]
         
         
-        m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
-        
-        
         heatmap_data = []
         for _, row in valid_posts.iterrows():
             
@@ -218,12 +278,7 @@ class LocationAnalyzer:
             heatmap_data.append([row['latitude'], row['longitude'], weight])
         
         
-        HeatMap(heatmap_data).add_to(m)
-        
-       
-        marker_cluster = MarkerCluster().add_to(m)
-        
-        #Adding high-risk posts to the heatmap
+        markers = []
         for _, row in valid_posts[valid_posts['risk_level'] == 'High'].iterrows():
             popup_text = f"""
             <b>Risk Level:</b> {row['risk_level']}<br>
@@ -231,28 +286,21 @@ class LocationAnalyzer:
             <b>Location:</b> {row['location']}<br>
             <b>Content:</b> {row['content'][:100]}...
             """
-            
-            folium.Marker(
-                location=[row['latitude'], row['longitude']],
-                popup=folium.Popup(popup_text, max_width=300),
-                icon=folium.Icon(color='red', icon='info-sign')
-            ).add_to(marker_cluster)
-        
+            markers.append((row['latitude'], row['longitude'], popup_text))
         
-        m.save(f'data/crisis_heatmap.html')
-        print(f"\nHeatmap saved to data/crisis_heatmap")
+        return FigureJob('heatmap', render_heatmap, {
+            'heatmap_data': heatmap_data,
+            'markers': markers
+        }, f'data/{output_file}', preview=False)
     
-    def create_regional_analysis(self, df):
-        """Create visualizations of regional distress patterns"""
-        
-        os.makedirs('data', exist_ok=True)
+    def regional_analysis_job(self, df):
+        """Build the render job for the regional distress patterns visualization"""
         
-        
-        state_df = df[df['state'].notna()]
+        state_df = df[df['state'].notna()].copy()
         
         if len(state_df) == 0:
             print("No state data available for regional analysis")
-            return
+            return None
         
         
         state_df['state_full_name'] = state_df['state'].apply(self.get_full_state_name)
@@ -263,48 +311,50 @@ class LocationAnalyzer:
         
         state_risk = pd.crosstab(state_df['state_full_name'], state_df['risk_level'])
         
-        
-        state_sentiment = pd.crosstab(state_df['state_full_name'], state_df['sentiment'])
-        
-        
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        
+        return FigureJob('regional distress patterns visualization', render_regional_patterns, {
+            'state_counts': state_counts,
+            'state_risk': state_risk
+        }, 'data/regional_distress_patterns.png')
+    
+    def create_heatmap(self, df, output_file='crisis_heatmap.html'):
+        """Create a heatmap of crisis-related posts.
 
-        state_counts.plot(kind='bar', ax=axes[0, 0], color='skyblue')
-        axes[0, 0].set_title('Number of Crisis Posts by State')
-        axes[0, 0].set_xlabel('State')
-        axes[0, 0].set_ylabel('Number of Posts')
-        plt.setp(axes[0, 0].xaxis.get_majorticklabels(), rotation=45, ha='right')
+        Returns a dict mapping the heatmap name to the path of its HTML file.
+        """
         
+        os.makedirs('data', exist_ok=True)
         
-        for i, v in enumerate(state_counts.values):
-            axes[0, 0].text(i, v + 0.5, str(v), ha='center', va='bottom')
+        return self.renderer.render([self.heatmap_job(df, output_file)])
+    
+    def create_regional_analysis(self, df):
+        """Create visualizations of regional distress patterns.
+
+        Returns a dict mapping the visualization name to the path of its PNG file,
+        or None when no state data is available.
+        """
         
-        #Bar plot of risk levels by state
-        state_risk.plot(kind='bar', stacked=True, ax=axes[0, 1], colormap='viridis')
-        axes[0, 1].set_title('Risk Levels by State')
-        axes[0, 1].set_xlabel('State')
-        axes[0, 1].set_ylabel('Number of Posts')
-        axes[0, 1].legend(title='Risk Level')
-        plt.setp(axes[0, 1].xaxis.get_majorticklabels(), rotation=45, ha='right')
+        os.makedirs('data', exist_ok=True)
         
-        #Heatmap of risk levels by state
-        sns.heatmap(state_risk, annot=True, fmt='d', cmap='YlGnBu', ax=axes[1, 0])
-        axes[1, 0].set_title('Risk Levels by State (Heatmap)')
+        job = self.regional_analysis_job(df)
+        if job is None:
+            return None
         
-        #Top 5 states with crisis posts
-        top_states = state_counts.head(5)
-        axes[1, 1].pie(top_states.values, labels=top_states.index, autopct='%1.1f%%', 
-                      startangle=90, colors=sns.color_palette('viridis'))
-        axes[1, 1].set_title('Top 5 States with Crisis Posts')
+        return self.renderer.render([job])
+    
+    def create_visualizations(self, df, output_file='crisis_heatmap.html'):
+        """Render the heatmap and regional analysis concurrently.
+
+        Returns a dict mapping each visualization name to the path of its output file.
+        """
         
-        #Saving the regional distress patterns visualization to a PNG file
-        plt.tight_layout()
-        plt.savefig('data/regional_distress_patterns.png', dpi=300)
-        print("\nRegional distress patterns visualization saved to data/regional_distress_patterns.png")
+        os.makedirs('data', exist_ok=True)
         
+        jobs = [self.heatmap_job(df, output_file)]
+        regional_job = self.regional_analysis_job(df)
+        if regional_job is not None:
+            jobs.append(regional_job)
         
-        return fig
+        return self.renderer.render(jobs)
     
     def get_full_state_name(self, state_abbr):
         """Convert state abbreviation to full state name"""
@@ -339,20 +389,21 @@ class LocationAnalyzer:
         print(f"\nLocation-analyzed data saved to data/{filename}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Crisis geolocation and mapping')
+    parser.add_argument('--preview', action='store_true', help='Render low-dpi preview figures')
+    args = parser.parse_args()
+    
     #Reading the analyzed data
     df = pd.read_csv('data/analyzed_posts.csv')
     
     #Initializing the analyzer      
-    analyzer = LocationAnalyzer()
+    analyzer = LocationAnalyzer(preview=args.preview)
     
     #Analyzing locations in the dataset
     location_df = analyzer.analyze_locations(df)
     
-    #Analyzing locations in the dataset     
-    analyzer.create_heatmap(location_df)
-    
-    #Creating a heatmap of crisis-related posts
-    analyzer.create_regional_analysis(location_df)
+    #Creating the heatmap and regional distress patterns visualization
+    analyzer.create_visualizations(location_df)
     
     #Top locations with highest crisis discussions
     top_locations = analyzer.get_top_locations(location_df)
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+# Forcing a non-interactive backend so figures can be rendered in worker processes
+matplotlib.use('Agg')
+import pandas as pd
+
+FULL_DPI = 300
+PREVIEW_DPI = 72
+
+
+class FigureJob:
+    def __init__(self, name, render_func, data, output_path, preview=True):
+        # render_func must be a module-level function taking (data, output_path, dpi)
+        # so it can be sent to a worker process
+        self.name = name
+        self.render_func = render_func
+        self.data = data
+        self.output_path = output_path
+        # Jobs whose output does not depend on dpi (e.g. HTML maps) are skipped in preview mode
+        self.preview = preview
+
+
+def _fingerprint(obj):
+    """Stable text representation of the aggregates a figure is drawn from"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj.to_csv()
+    if isinstance(obj, dict):
+        return '{' + ','.join(f"{_fingerprint(k)}:{_fingerprint(v)}" for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))) + '}'
+    if isinstance(obj, (list, tuple)):
+        return '[' + ','.join(_fingerprint(item) for item in obj) + ']'
+    return repr(obj)
+
+
+def _render_job(render_func, data, output_path, dpi):
+    """Render a single figure in a worker process and return the elapsed time"""
+    start = time.perf_counter()
+    render_func(data, output_path, dpi)
+    return time.perf_counter() - start
+
+
+class FigureRenderer:
+    def __init__(self, preview=False, max_workers=None, cache_file='data/.render_cache.json'):
+        # Preview mode renders at low dpi to *_preview files for quick checks of the report
+        self.preview = preview
+        self.dpi = PREVIEW_DPI if preview else FULL_DPI
+        self.max_workers = max_workers
+        self.cache_file = cache_file
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable render cache {self.cache_file}: {str(e)}")
+            return {}
+
+    def _save_cache(self, cache):
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+    def output_path(self, job):
+        """Path a job renders to, preview output is kept apart from the full report"""
+        if not self.preview:
+            return job.output_path
+        root, ext = os.path.splitext(job.output_path)
+        return f"{root}_preview{ext}"
+
+    def job_hash(self, job):
+        """Hash of the figure's input aggregates, render function source and dpi"""
+        # Keyed on the file name rather than __module__, which is __main__ when run as a script
+        source_file = inspect.getsourcefile(job.render_func) or ''
+        render_name = f"{os.path.basename(source_file)}:{job.render_func.__qualname__}"
+        try:
+            # Changing how a figure is drawn invalidates it even when the data is unchanged
+            source = inspect.getsource(job.render_func)
+        except (OSError, TypeError):
+            source = ''
+        key = f"{render_name}|{source}|{self.dpi}|{_fingerprint(job.data)}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def render(self, jobs):
+        """Render independent figures concurrently, skipping those whose inputs are unchanged.
+
+        Returns a dict mapping each job name to the path of its rendered (or cached) output.
+        """
+        cache = self._load_cache()
+        results = {}
+
+        pending = []
+        for job in jobs:
+            if self.preview and not job.preview:
+                print(f"Skipping {job.name}: no preview available")
+                continue
+            output_path = self.output_path(job)
+            digest = self.job_hash(job)
+            if cache.get(output_path) == digest and os.path.exists(output_path):
+                print(f"Skipping {job.name}: inputs unchanged since last run ({output_path})")
+                results[job.name] = output_path
+                continue
+            pending.append((job, output_path, digest))
+
+        if not pending:
+            return results
+
+        for _, output_path, _ in pending:
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+        total_start = time.perf_counter()
+
+        if len(pending) == 1:
+            # A single figure is rendered in-process, a worker pool would only add startup cost
+            max_workers = 1
+            job, output_path, digest = pending[0]
+            try:
+                outcomes = [(job, output_path, digest, _render_job(job.render_func, job.data, output_path, self.dpi), None)]
+            except Exception as e:
+                outcomes = [(job, output_path, digest, None, e)]
+            self._record(outcomes, cache, results)
+        else:
+            max_workers = self.max_workers or min(len(pending), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    (job, output_path, digest, executor.submit(_render_job, job.render_func, job.data, output_path, self.dpi))
+                    for job, output_path, digest in pending
+                ]
+                self._record(self._collect(futures), cache, results)
+
+        print(f"Rendered {len(pending)} figure(s) in {time.perf_counter() - total_start:.2f}s "
+              f"using {max_workers} worker(s)")
+
+        self._save_cache(cache)
+        return results
+
+    def _collect(self, futures):
+        """Yield (job, output_path, digest, elapsed, error) as worker results come in"""
+        for job, output_path, digest, future in futures:
+            try:
+                yield job, output_path, digest, future.result(), None
+            except Exception as e:
+                yield job, output_path, digest, None, e
+
+    def _record(self, outcomes, cache, results):
+        """Update the cache and results with rendered figures, failed ones are not cached"""
+        for job, output_path, digest, elapsed, error in outcomes:
+            if error is not None:
+                print(f"Error rendering {job.name}: {str(error)}")
+                cache.pop(output_path, None)
+                continue
+
+            cache[output_path] = digest
+            results[job.name] = output_path
+            print(f"Rendered {job.name} to {output_path} in {elapsed:.2f}s (dpi={self.dpi})")
@@ -5,14 +5,79 @@ from textblob import TextBlob
 import re
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
+from rendering import FigureJob, FigureRenderer
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import argparse
+
+
+def render_distribution_overview(data, output_path, dpi):
+    """Render the 2x2 overview of risk level and sentiment distributions"""
+    risk_counts = data['risk_counts']
+    sentiment_counts = data['sentiment_counts']
+    cross_tab = data['cross_tab']
+    
+    sns.set(style="whitegrid")
+    
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    
+    #Bar plot of risk level distribution
+    sns.barplot(x=risk_counts.index, y=risk_counts.values, ax=axes[0, 0], palette='viridis')
+    axes[0, 0].set_title('Distribution of Risk Levels')
+    axes[0, 0].set_xlabel('Risk Level')
+    axes[0, 0].set_ylabel('Number of Posts')
+    
+    
+    for i, v in enumerate(risk_counts.values):
+        axes[0, 0].text(i, v + 0.5, str(v), ha='center')
+    
+    #Bar plot of sentiment distribution
+    sns.barplot(x=sentiment_counts.index, y=sentiment_counts.values, ax=axes[0, 1], palette='viridis')
+    axes[0, 1].set_title('Distribution of Sentiments')
+    axes[0, 1].set_xlabel('Sentiment')
+    axes[0, 1].set_ylabel('Number of Posts')
+    
+    
+    for i, v in enumerate(sentiment_counts.values):
+        axes[0, 1].text(i, v + 0.5, str(v), ha='center')
+    
+    #Heatmap of sentiment vs risk level
+    sns.heatmap(cross_tab, annot=True, fmt='d', cmap='YlGnBu', ax=axes[1, 0])
+    axes[1, 0].set_title('Sentiment vs Risk Level')
+    
+    #Pie chart of risk level distribution
+    axes[1, 1].pie(risk_counts.values, labels=risk_counts.index, autopct='%1.1f%%', 
+                  startangle=90, colors=sns.color_palette('viridis'))
+    axes[1, 1].set_title('Risk Level Distribution')
+    
+    plt.tight_layout()
+    fig.savefig(output_path, dpi=dpi)
+    plt.close(fig)
+
+
+def render_sentiment_by_risk(data, output_path, dpi):
+    """Render the stacked bar chart of sentiment within each risk level"""
+    sns.set(style="whitegrid")
+    
+    fig, ax = plt.subplots(figsize=(10, 6))
+    data['risk_sentiment'].plot(kind='bar', stacked=True, colormap='viridis', ax=ax)
+    ax.set_title('Sentiment Distribution Within Risk Levels')
+    ax.set_xlabel('Risk Level')
+    ax.set_ylabel('Number of Posts')
+    ax.legend(title='Sentiment')
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi)
+    plt.close(fig)
+
 
 class CrisisAnalyzer:
-    def __init__(self):
+    def __init__(self, preview=False):
         self.vader = SentimentIntensityAnalyzer()
         
+        # Figures are rendered in worker processes and skipped when their inputs are unchanged
+        self.renderer = FigureRenderer(preview=preview)
+        
         
         self.high_risk_patterns = [
             r'suicid[ea]', r'kill\s+myself', r'end\s+it\s+all',
@@ -103,66 +168,31 @@ class CrisisAnalyzer:
         return distribution_table, percentage_table
     
     def create_distribution_plots(self, df):
-        """Plots showing the distribution of posts by sentiment and risk category"""
+        """Plots showing the distribution of posts by sentiment and risk category.
+
+        Returns a dict mapping each plot name to the path of its PNG file.
+        """
         
         os.makedirs('data', exist_ok=True)
         
-        
-        sns.set(style="whitegrid")
-        
-        
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        
-        #Bar plot of risk level distribution
+        #Aggregates are computed here so only the small tables are sent to the render workers
         risk_counts = df['risk_level'].value_counts()
-        sns.barplot(x=risk_counts.index, y=risk_counts.values, ax=axes[0, 0], palette='viridis')
-        axes[0, 0].set_title('Distribution of Risk Levels')
-        axes[0, 0].set_xlabel('Risk Level')
-        axes[0, 0].set_ylabel('Number of Posts')
-        
-        
-        for i, v in enumerate(risk_counts.values):
-            axes[0, 0].text(i, v + 0.5, str(v), ha='center')
-        
-        #Bar plot of sentiment distribution
         sentiment_counts = df['sentiment'].value_counts()
-        sns.barplot(x=sentiment_counts.index, y=sentiment_counts.values, ax=axes[0, 1], palette='viridis')
-        axes[0, 1].set_title('Distribution of Sentiments')
-        axes[0, 1].set_xlabel('Sentiment')
-        axes[0, 1].set_ylabel('Number of Posts')
-        
-        
-        for i, v in enumerate(sentiment_counts.values):
-            axes[0, 1].text(i, v + 0.5, str(v), ha='center')
-        
-        #Heatmap of sentiment vs risk level
         cross_tab = pd.crosstab(df['sentiment'], df['risk_level'])
-        sns.heatmap(cross_tab, annot=True, fmt='d', cmap='YlGnBu', ax=axes[1, 0])
-        axes[1, 0].set_title('Sentiment vs Risk Level')
-        
-        #Pie chart of risk level distribution
-        axes[1, 1].pie(risk_counts.values, labels=risk_counts.index, autopct='%1.1f%%', 
-                      startangle=90, colors=sns.color_palette('viridis'))
-        axes[1, 1].set_title('Risk Level Distribution')
-        
-        #Stacked bar chart of sentiment within each risk level
-        plt.tight_layout()
-        plt.savefig('data/sentiment_risk_distribution.png', dpi=300)
-        print("\nDistribution plots saved to data/sentiment_risk_distribution.png")
-        
-        
-        plt.figure(figsize=(10, 6))
         risk_sentiment = pd.crosstab(df['risk_level'], df['sentiment'])
-        risk_sentiment.plot(kind='bar', stacked=True, colormap='viridis')
-        plt.title('Sentiment Distribution Within Risk Levels')
-        plt.xlabel('Risk Level')
-        plt.ylabel('Number of Posts')
-        plt.legend(title='Sentiment')
-        plt.tight_layout()
-        plt.savefig('data/sentiment_by_risk.png', dpi=300)
-        print("Sentiment by risk level plot saved to data/sentiment_by_risk.png")
         
-        return fig
+        jobs = [
+            FigureJob('distribution plots', render_distribution_overview, {
+                'risk_counts': risk_counts,
+                'sentiment_counts': sentiment_counts,
+                'cross_tab': cross_tab
+            }, 'data/sentiment_risk_distribution.png'),
+            FigureJob('sentiment by risk level plot', render_sentiment_by_risk, {
+                'risk_sentiment': risk_sentiment
+            }, 'data/sentiment_by_risk.png')
+        ]
+        
+        return self.renderer.render(jobs)
     
     def save_analyzed_data(self, df, filename='analyzed_posts.csv'):
         #Saving the analyzed data to a CSV file
@@ -174,10 +204,14 @@ class CrisisAnalyzer:
 
 def main():
     #Main function to execute the sentiment analysis
+    parser = argparse.ArgumentParser(description='Sentiment and crisis risk analysis')
+    parser.add_argument('--preview', action='store_true', help='Render low-dpi preview figures')
+    args = parser.parse_args()
+    
     df = pd.read_csv('data/reddit_posts.csv')
     
     #Read the data
-    analyzer = CrisisAnalyzer()
+    analyzer = CrisisAnalyzer(preview=args.preview)
     
     #Analyze the posts
     analyzed_df = analyzer.analyze_posts(df)
@@ -193,6 +227,17 @@ def main():
     
     #Save the analyzed data to a CSV file
     analyzer.save_analyzed_data(analyzed_df)
+    
+    #Analyze the comment threads with the same risk and sentiment path, if they were extracted
+    if os.path.exists('data/reddit_comments.csv'):
+        comments_df = pd.read_csv('data/reddit_comments.csv')
+        comments_df['cleaned_content'] = comments_df['cleaned_content'].fillna('')
+        analyzed_comments_df = analyzer.analyze_posts(comments_df)
+        analyzer.save_analyzed_data(analyzed_comments_df, filename='analyzed_comments.csv')
+    elif os.path.exists('data/analyzed_comments.csv'):
+        #Removing comment analysis of an earlier run so it is not mistaken for the new posts' comments
+        os.remove('data/analyzed_comments.csv')
+        print("Removed stale data/analyzed_comments.csv from an earlier run")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,230 @@
+import threading
+import time
+
+import prawcore
+
+from data_extraction import CountingRequestor, RedditExtractor, RequestCounter, RequestThrottle
+
+# Fixed number of API calls charged by the stub for each replace_more call
+REPLACE_MORE_CALLS = 2
+
+
+class StubAuthor:
+    def __init__(self, name):
+        self.name = name
+
+
+class StubComment:
+    def __init__(self, comment_id, body):
+        self.id = comment_id
+        self.body = body
+        self.parent_id = 't3_post'
+        self.depth = 0
+        self.created_utc = 1700000000
+        self.score = 1
+        self.author = StubAuthor('someone')
+
+
+class StubMoreComments:
+    # Like praw's MoreComments, an unexpanded stub has no body
+    pass
+
+
+class StubCommentForest:
+    def __init__(self, reddit, comments):
+        self._reddit = reddit
+        self._comments = comments
+
+    def list(self):
+        return list(self._comments)
+
+    def replace_more(self, limit=32):
+        self._reddit.replace_more_limits.append(limit)
+        self._reddit.spend(REPLACE_MORE_CALLS)
+        return []
+
+
+class StubSubmission:
+    def __init__(self, reddit, post_id):
+        self._reddit = reddit
+        self.id = post_id
+        self.comment_limit = None
+
+    @property
+    def comments(self):
+        self._reddit.comment_limits.append(self.comment_limit)
+        self._reddit.spend(1)
+        return StubCommentForest(self._reddit, self._reddit.threads[self.id]())
+
+
+class StubReddit:
+    instances = []
+
+    def __init__(self, threads, counter=None):
+        self.threads = threads
+        self.counter = counter
+        self.request_threads = set()
+        self.replace_more_limits = []
+        self.comment_limits = []
+        StubReddit.instances.append(self)
+
+    def spend(self, calls):
+        self.request_threads.add(threading.get_ident())
+        if self.counter is not None:
+            self.counter.calls += calls
+
+    def submission(self, id):
+        return StubSubmission(self, id)
+
+
+class StubResponse:
+    status_code = 429
+    headers = {}
+    text = ''
+
+
+def nested_thread():
+    return [
+        StubComment('c1', 'I live in Denver, CO and feel hopeless'),
+        StubComment('c2', '[deleted]'),
+        StubComment('c3', '[removed]'),
+        StubMoreComments(),
+        StubComment('c4', 'Please reach out to someone')
+    ]
+
+
+def long_thread():
+    return [StubComment(f'l{i}', f'Comment number {i}') for i in range(5)]
+
+
+def broken_thread():
+    raise RuntimeError('comment fetch failed')
+
+
+def rate_limited_thread(failures):
+    remaining = [failures]
+
+    def thread():
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            raise prawcore.TooManyRequests(StubResponse())
+        return long_thread()
+    return thread
+
+
+def make_extractor(threads=None):
+    threads = threads or {'nested': nested_thread, 'long': long_thread, 'broken': broken_thread}
+    StubReddit.instances = []
+    extractor = RedditExtractor(client_factory=lambda counter=None, throttle=None: StubReddit(threads, counter))
+    extractor.retry_backoff = 0
+    return extractor
+
+
+def worker_clients(extractor):
+    return [client for client in StubReddit.instances if client is not extractor.reddit_client]
+
+
+def test_comments_are_linked_to_posts_and_filtered():
+    extractor = make_extractor()
+    comments_df = extractor.extract_comments(['nested'], max_workers=1)
+
+    assert list(comments_df['comment_id']) == ['c1', 'c4']
+    assert set(comments_df['post_id']) == {'nested'}
+    assert comments_df.loc[0, 'cleaned_content'] == 'I live in Denver CO and feel hopeless'
+
+
+def test_limits_are_passed_to_praw():
+    extractor = make_extractor()
+    extractor.extract_comments(['nested'], max_workers=1, comment_budget=50, replace_more_limit=5)
+
+    client, = worker_clients(extractor)
+    assert client.replace_more_limits == [5]
+    assert client.comment_limits == [50]
+
+
+def test_comment_budget_per_post():
+    extractor = make_extractor()
+    comments_df = extractor.extract_comments(['long'], max_workers=1, comment_budget=3)
+
+    assert len(comments_df) == 3
+
+
+def test_comment_stats_count_failed_posts():
+    extractor = make_extractor()
+    comments_df = extractor.extract_comments(['nested', 'long', 'broken'], max_workers=2)
+
+    assert set(comments_df['post_id']) == {'nested', 'long'}
+    assert extractor.comment_stats['posts'] == 3
+    assert extractor.comment_stats['failed_posts'] == 1
+    assert extractor.comment_stats['comments'] == 7
+    # nested and long: 1 fetch + replace_more each, broken: 1 failed fetch
+    assert extractor.comment_stats['api_calls'] == 2 * (1 + REPLACE_MORE_CALLS) + 1
+
+
+def test_rate_limited_fetches_are_retried():
+    extractor = make_extractor({'limited': rate_limited_thread(failures=2)})
+    comments_df = extractor.extract_comments(['limited'], max_workers=1)
+
+    assert len(comments_df) == 5
+    assert extractor.comment_stats['failed_posts'] == 0
+    assert extractor.comment_stats['api_calls'] == 2 + 1 + REPLACE_MORE_CALLS
+
+
+def test_rate_limited_fetches_give_up_after_max_retries():
+    extractor = make_extractor({'limited': rate_limited_thread(failures=5)})
+    extractor.max_retries = 1
+    comments_df = extractor.extract_comments(['limited'], max_workers=1)
+
+    assert len(comments_df) == 0
+    assert extractor.comment_stats['failed_posts'] == 1
+    assert extractor.comment_stats['api_calls'] == 2
+
+
+def test_workers_use_their_own_clients():
+    extractor = make_extractor()
+    extractor.extract_comments(['nested', 'long', 'broken'] * 4, max_workers=3)
+
+    clients = worker_clients(extractor)
+    assert clients
+    assert all(len(client.request_threads) == 1 for client in clients)
+
+
+class StubSession:
+    def __init__(self):
+        self.headers = {}
+        self.requests = 0
+
+    def request(self, *args, **kwargs):
+        self.requests += 1
+        return None
+
+
+def test_counting_requestor_counts_http_requests():
+    counter = RequestCounter()
+    session = StubSession()
+    requestor = CountingRequestor(user_agent='crisis monitor tests', session=session, counter=counter,
+                                  throttle=RequestThrottle(min_interval=0))
+
+    requestor.request('get', 'https://oauth.reddit.com/comments/abc')
+    requestor.request('post', 'https://www.reddit.com/api/v1/access_token')
+
+    assert counter.calls == 2
+    assert session.requests == 2
+
+
+def test_throttle_spaces_out_requests():
+    throttle = RequestThrottle(min_interval=0.05)
+    times = []
+
+    def worker():
+        throttle.wait()
+        times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times.sort()
+    assert times[-1] - times[0] >= 2 * 0.05 - 0.01
@@ -0,0 +1,99 @@
+import json
+import types
+
+from rendering import FULL_DPI, PREVIEW_DPI, FigureJob, FigureRenderer
+
+
+def write_value(data, output_path, dpi):
+    with open(output_path, 'w') as f:
+        f.write(f"{data['value']}@{dpi}")
+
+
+def fail_render(data, output_path, dpi):
+    raise RuntimeError('render failed')
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def make_renderer(tmp_path, preview=False):
+    return FigureRenderer(preview=preview, cache_file=str(tmp_path / 'cache.json'))
+
+
+def test_unchanged_data_is_skipped(tmp_path):
+    output = tmp_path / 'figure.txt'
+    renderer = make_renderer(tmp_path)
+
+    renderer.render([FigureJob('figure', write_value, {'value': 1}, str(output))])
+    assert read(output) == f"1@{FULL_DPI}"
+
+    # A skipped job leaves the file untouched
+    output.write_text('stale')
+    results = renderer.render([FigureJob('figure', write_value, {'value': 1}, str(output))])
+    assert results == {'figure': str(output)}
+    assert read(output) == 'stale'
+
+
+def test_changed_data_is_rendered_again(tmp_path):
+    output = tmp_path / 'figure.txt'
+    renderer = make_renderer(tmp_path)
+
+    renderer.render([FigureJob('figure', write_value, {'value': 1}, str(output))])
+    renderer.render([FigureJob('figure', write_value, {'value': 2}, str(output))])
+
+    assert read(output) == f"2@{FULL_DPI}"
+
+
+def test_preview_writes_separate_files(tmp_path):
+    output = tmp_path / 'figure.txt'
+    make_renderer(tmp_path).render([FigureJob('figure', write_value, {'value': 1}, str(output))])
+
+    results = make_renderer(tmp_path, preview=True).render([FigureJob('figure', write_value, {'value': 1}, str(output))])
+
+    preview_output = tmp_path / 'figure_preview.txt'
+    assert results == {'figure': str(preview_output)}
+    assert read(preview_output) == f"1@{PREVIEW_DPI}"
+    assert read(output) == f"1@{FULL_DPI}"
+
+
+def test_jobs_without_preview_are_skipped_in_preview_mode(tmp_path):
+    output = tmp_path / 'map.html'
+    results = make_renderer(tmp_path, preview=True).render(
+        [FigureJob('map', write_value, {'value': 1}, str(output), preview=False)])
+
+    assert results == {}
+    assert not (tmp_path / 'map_preview.html').exists()
+
+
+def test_failed_jobs_are_not_cached(tmp_path):
+    good_output = tmp_path / 'good.txt'
+    bad_output = tmp_path / 'bad.txt'
+    jobs = [
+        FigureJob('good', write_value, {'value': 1}, str(good_output)),
+        FigureJob('bad', fail_render, {'value': 1}, str(bad_output))
+    ]
+
+    results = make_renderer(tmp_path).render(jobs)
+
+    assert results == {'good': str(good_output)}
+    cache = json.loads(read(tmp_path / 'cache.json'))
+    assert str(good_output) in cache
+    assert str(bad_output) not in cache
+
+
+def test_hash_does_not_depend_on_module_name(tmp_path):
+    renderer = make_renderer(tmp_path)
+    as_script = types.FunctionType(write_value.__code__, write_value.__globals__, 'write_value')
+    as_script.__module__ = '__main__'
+
+    assert renderer.job_hash(FigureJob('figure', write_value, {'value': 1}, 'out.txt')) == \
+        renderer.job_hash(FigureJob('figure', as_script, {'value': 1}, 'out.txt'))
+
+
+def test_hash_depends_on_render_function_source(tmp_path):
+    renderer = make_renderer(tmp_path)
+
+    assert renderer.job_hash(FigureJob('figure', write_value, {'value': 1}, 'out.txt')) != \
+        renderer.job_hash(FigureJob('figure', fail_render, {'value': 1}, 'out.txt'))